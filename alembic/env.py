@@ -0,0 +1,58 @@
+# alembic/env.py
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+
+# Import modules from our project
+from database import engine, Base, SQLALCHEMY_DATABASE_URL
+import models  # noqa: F401 - registers the models on Base.metadata
+
+# Alembic Config object, which provides access to the values within alembic.ini
+config = context.config
+
+# Set up Python logging from the config file
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Model metadata used for 'alembic revision --autogenerate'
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """
+    Run migrations in 'offline' mode, emitting SQL to stdout instead of executing it.
+    """
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    """
+    Run migrations in 'online' mode against the application's async engine.
+    """
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
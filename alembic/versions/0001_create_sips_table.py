@@ -0,0 +1,40 @@
+"""create sips table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sips",
+        sa.Column("id", postgresql.UUID(as_uuid=True), server_default=sa.text("gen_random_uuid()"), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("scheme_name", sa.String(), nullable=False),
+        sa.Column("monthly_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Matches the schema the old startup create_all produced (index=True on user_id),
+    # so databases created that way can be stamped at this revision.
+    op.create_index("ix_sips_user_id", "sips", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sips_user_id", table_name="sips")
+    op.drop_table("sips")
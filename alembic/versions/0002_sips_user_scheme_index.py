@@ -0,0 +1,35 @@
+"""replace sips user_id index with (user_id, scheme_name) covering index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF [NOT] EXISTS because a database created by create_all may already be on either index
+    op.drop_index("ix_sips_user_id", table_name="sips", if_exists=True)
+    op.create_index(
+        "ix_sips_user_scheme",
+        "sips",
+        ["user_id", "scheme_name"],
+        unique=False,
+        postgresql_include=["monthly_amount", "start_date"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sips_user_scheme", table_name="sips")
+    op.create_index("ix_sips_user_id", "sips", ["user_id"], unique=False)
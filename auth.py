@@ -1,7 +1,14 @@
 # auth.py
 import os
+import time
+import base64
+import uuid
+import asyncio
+from collections import OrderedDict
 from datetime import datetime, timezone
-from jose import jwt, JWTError
+import orjson
+import jwt
+from jwt import PyJWK, InvalidTokenError as JWTError
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
@@ -17,10 +24,42 @@ load_dotenv()
 SUPABASE_SECRET_KEY = os.getenv("SUPABASE_SECRET_KEY", "your-super-secret-supabase-jwt-key")
 ALGORITHM = "HS256" # Supabase uses HS256 for JWT signing by default
 
+# Prepare the HMAC verification key once per process instead of on every jwt.decode call
+_SIGNING_JWK = PyJWK({
+    "kty": "oct",
+    "k": base64.urlsafe_b64encode(SUPABASE_SECRET_KEY.encode()).rstrip(b"=").decode(),
+    "alg": ALGORITHM,
+})
+
 # Initialize HTTPBearer for extracting token from Authorization header
 security = HTTPBearer()
 
-async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
+# In-process cache of validated tokens: raw token -> (parsed user UUID, exp).
+# Clients reuse the same bearer token for its whole lifetime, so repeat requests
+# can skip signature verification and become a dict lookup plus a timestamp compare.
+# Only successfully validated tokens are cached; failures always go through jwt.decode.
+TOKEN_CACHE_MAX_SIZE = 10_000
+_token_cache: "OrderedDict[str, tuple[uuid.UUID, float]]" = OrderedDict()
+_token_cache_lock = asyncio.Lock()
+
+def _fast_header_check(token: str) -> None:
+    """
+    Cheap structural pre-check on the JWT header, run before signature verification.
+    Rejects malformed or wrong-algorithm tokens (e.g. scanner traffic) without touching HMAC.
+
+    Raises:
+        HTTPException: If the header cannot be decoded or does not declare the expected algorithm.
+    """
+    header_b64 = token.split(".", 1)[0]
+    padding = "=" * (-len(header_b64) % 4)
+    try:
+        header = orjson.loads(base64.urlsafe_b64decode(header_b64 + padding))
+    except ValueError: # Covers both invalid base64 and invalid JSON
+        raise HTTPException(status_code=401, detail="Invalid token: Malformed header")
+    if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+        raise HTTPException(status_code=401, detail="Invalid token: Unsupported algorithm")
+
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Security(security)) -> uuid.UUID:
     """
     FastAPI dependency to extract and validate the user_id from a Supabase JWT.
 
@@ -28,35 +67,58 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Securi
         credentials: HTTPAuthorizationCredentials object containing the Bearer token.
 
     Returns:
-        The user ID (sub) from the JWT payload.
+        The user ID (sub) from the JWT payload, parsed as a UUID.
 
     Raises:
         HTTPException: If the token is invalid, expired, or missing required claims.
     """
     token = credentials.credentials
-    try:
-        # Decode the JWT.
-        # audience=None allows for flexible audience validation, but in production,
-        # you might want to specify your Supabase project URL here.
-        payload = jwt.decode(token, SUPABASE_SECRET_KEY, algorithms=[ALGORITHM], audience=None)
+    now = time.time()
 
-        user_id: str = payload.get("sub") # Supabase uses 'sub' for user ID
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token: Missing 'sub' claim")
+    async with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            cached_user_uuid, cached_exp = cached
+            if now <= cached_exp:
+                _token_cache.move_to_end(token) # Mark as most recently used
+                return cached_user_uuid
+            # Lazily drop expired entries when we come across them
+            del _token_cache[token]
 
-        # Check for token expiration (Supabase JWTs have an 'exp' claim)
-        expiration_timestamp = payload.get("exp")
-        if expiration_timestamp is None:
-            raise HTTPException(status_code=401, detail="Invalid token: Missing expiration ('exp') claim")
+    _fast_header_check(token)
+
+    try:
+        # Decode the JWT.
+        # PyJWT verifies the signature and 'exp', and "require" rejects tokens without
+        # 'sub' (Supabase's user ID claim) or 'exp', so no manual expiry check is needed.
+        # Audience validation is skipped for flexibility, but in production,
+        # you might want to pass audience="authenticated" and drop verify_aud.
+        payload = jwt.decode(
+            token,
+            _SIGNING_JWK, # PyJWT >= 2.10 uses a PyJWK's prepared key as-is, skipping prepare_key
+            algorithms=[ALGORITHM],
+            options={"verify_aud": False, "require": ["exp", "sub"]},
+        )
+        user_id: str = payload["sub"]
+        expiration_timestamp = payload["exp"]
 
-        # Convert expiration timestamp to a datetime object
-        expiration_datetime = datetime.fromtimestamp(expiration_timestamp, tz=timezone.utc)
-        current_datetime = datetime.now(timezone.utc)
+        # Parse the user ID once here so downstream CRUD can use it as-is
+        try:
+            user_uuid = uuid.UUID(user_id)
+        except ValueError:
+            raise HTTPException(status_code=401, detail="Invalid token: 'sub' claim is not a valid UUID")
 
-        if current_datetime > expiration_datetime:
-            raise HTTPException(status_code=401, detail="Token has expired")
+        async with _token_cache_lock:
+            _token_cache[token] = (user_uuid, float(expiration_timestamp))
+            _token_cache.move_to_end(token)
+            # Evict least recently used entries once over capacity
+            while len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+                _token_cache.popitem(last=False)
 
-        return user_id
+        return user_uuid
+    except HTTPException:
+        # Already a client error raised above; don't turn it into a 500
+        raise
     except JWTError as e:
         # Catch specific JWT errors (e.g., signature mismatch, invalid claims)
         raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
@@ -1,14 +1,15 @@
 # crud.py
 from datetime import date
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, cast, Numeric, Date
+from sqlalchemy import Row, insert, func, cast, extract, Integer, Numeric, Date
 from models import SIPPlan
 from schemas import SIPCreate
 from typing import List, Dict, Any
 import math
 
-async def create_sip_plan(db: AsyncSession, sip: SIPCreate, user_id: str) -> SIPPlan:
+async def create_sip_plan(db: AsyncSession, sip: SIPCreate, user_id: UUID) -> Dict[str, Any]:
     """
     Creates a new SIP plan in the database for a given user.
 
@@ -18,52 +19,96 @@ async def create_sip_plan(db: AsyncSession, sip: SIPCreate, user_id: str) -> SIP
         user_id: The ID of the user creating the SIP.
 
     Returns:
-        The newly created SIPPlan SQLAlchemy model instance.
+        A dictionary with the fields of the newly created SIP plan.
     """
-    # Convert user_id string to UUID for database compatibility
-    # Ensure user_id from auth is a valid UUID string
-    from uuid import UUID
-    user_uuid = UUID(user_id)
-
-    db_sip = SIPPlan(
-        user_id=user_uuid,
+    # INSERT ... RETURNING hands back auto-generated fields like id, created_at
+    # in the same round trip. Only those (plus the stored, 2-decimal amount) are
+    # returned as plain columns, so no SIPPlan entity is hydrated.
+    stmt = insert(SIPPlan).values(
+        user_id=user_id,
         scheme_name=sip.scheme_name,
         monthly_amount=sip.monthly_amount,
         start_date=sip.start_date
-    )
-    db.add(db_sip)
-    await db.commit()
-    await db.refresh(db_sip) # Refresh to get auto-generated fields like id, created_at
-    return db_sip
-
-async def get_user_sips(db: AsyncSession, user_id: str) -> List[SIPPlan]:
+    ).returning(SIPPlan.id, SIPPlan.monthly_amount, SIPPlan.created_at, SIPPlan.updated_at)
+    row = (await db.execute(stmt)).one()
+    # Committed by get_db once the request completes
+    return {
+        "id": row.id,
+        "user_id": user_id,
+        "scheme_name": sip.scheme_name,
+        "monthly_amount": row.monthly_amount,
+        "start_date": sip.start_date,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+async def get_user_sips(db: AsyncSession, user_id: UUID) -> List[Row]:
     """
-    Retrieves all SIP plans for a specific user.
+    Retrieves the fields needed for the SIP summary for all of a user's SIP plans.
+
+    Selects plain columns instead of SIPPlan entities, so no ORM objects or
+    identity-map entries are built for rows that are only going to be reduced.
 
     Args:
         db: The asynchronous database session.
         user_id: The ID of the user whose SIPs are to be retrieved.
 
     Returns:
-        A list of SIPPlan SQLAlchemy model instances.
+        A list of rows with `scheme_name`, `monthly_amount` and `start_date` attributes,
+        suitable for `calculate_sip_summary`.
     """
-    # Convert user_id string to UUID
-    from uuid import UUID
-    user_uuid = UUID(user_id)
+    stmt = (
+        select(SIPPlan.scheme_name, SIPPlan.monthly_amount, SIPPlan.start_date)
+        .where(SIPPlan.user_id == user_id)
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+async def get_user_sip_summary(db: AsyncSession, user_id: UUID) -> List[Dict[str, Any]]:
+    """
+    Computes the SIP summary for a user in a single aggregating query.
+
+    Postgres does the grouping and arithmetic, so only one row per scheme
+    crosses the wire instead of every SIPPlan row for the user.
+    Produces the same result as `calculate_sip_summary(await get_user_sips(...))`.
+
+    Args:
+        db: The asynchronous database session.
+        user_id: The ID of the user whose SIP summary is to be computed.
 
-    result = await db.execute(
-        select(SIPPlan).filter(SIPPlan.user_id == user_uuid)
+    Returns:
+        A list of dictionaries, each representing a SIP summary for a scheme.
+        Format: [{"scheme_name": "...", "total_invested": ..., "months_invested": ...}]
+    """
+    # Full months from start_date up to and including the current month,
+    # clamped to 0 for SIPs starting in the future (mirrors calculate_sip_summary).
+    months_expr = cast(
+        (extract("year", func.current_date()) - extract("year", SIPPlan.start_date)) * 12
+        + (extract("month", func.current_date()) - extract("month", SIPPlan.start_date)) + 1,
+        Integer,
+    )
+    months_clamped = func.greatest(months_expr, 0)
+
+    stmt = (
+        select(
+            SIPPlan.scheme_name,
+            func.sum(SIPPlan.monthly_amount * months_clamped).label("total_invested"),
+            func.max(months_clamped).label("months_invested"),
+        )
+        .where(SIPPlan.user_id == user_id)
+        .group_by(SIPPlan.scheme_name)
     )
-    sips = result.scalars().all()
-    return sips
+    rows = (await db.execute(stmt)).all()
+    return [dict(row._mapping) for row in rows]
 
 def calculate_sip_summary(sips: List[SIPPlan]) -> List[Dict[str, Any]]:
     """
     Calculates the SIP summary (total invested, months invested)
     from a list of SIP plans, grouped by scheme name.
+    In-Python counterpart of `get_user_sip_summary`, which the API uses.
 
     Args:
-        sips: A list of SIPPlan SQLAlchemy model instances for a user.
+        sips: A list of SIPPlan model instances (or rows from `get_user_sips`) for a user.
 
     Returns:
         A list of dictionaries, each representing a SIP summary for a scheme.
@@ -71,45 +116,39 @@ def calculate_sip_summary(sips: List[SIPPlan]) -> List[Dict[str, Any]]:
     """
     summary_by_scheme = {}
     current_date = date.today()
+    # Hoisted out of the loop to save attribute lookups per row
+    cy, cm = current_date.year, current_date.month
 
     for sip in sips:
         # Calculate months invested
         # This assumes SIPs are invested at the start of the month.
         # It counts full months from start_date up to and including the current month.
-        months_invested = (current_date.year - sip.start_date.year) * 12 + \
-                          (current_date.month - sip.start_date.month) + 1
+        start_date = sip.start_date
+        months_invested = (cy - start_date.year) * 12 + (cm - start_date.month) + 1
 
         # Ensure months_invested is not negative if start_date is in the future
-        months_invested = max(0, months_invested)
+        if months_invested < 0:
+            months_invested = 0
 
         # Calculate total invested for this specific SIP
+        # float() because SIPPlan instances built in Python may still hold a Decimal
         total_invested_for_sip = float(sip.monthly_amount) * months_invested
 
         # Aggregate into summary by scheme name
-        if sip.scheme_name not in summary_by_scheme:
-            summary_by_scheme[sip.scheme_name] = {
-                "scheme_name": sip.scheme_name,
+        scheme_name = sip.scheme_name
+        scheme_summary = summary_by_scheme.get(scheme_name)
+        if scheme_summary is None:
+            scheme_summary = summary_by_scheme[scheme_name] = {
+                "scheme_name": scheme_name,
                 "total_invested": 0.0,
                 "months_invested": 0
             }
-        
-        # Accumulate total invested and average months invested (or max, depending on interpretation)
-        # For 'months_invested' in summary, it's typically the average or max for that scheme across all plans
-        # If multiple SIPs for the same scheme, the summary 'months_invested' might be tricky.
-        # Let's assume 'months_invested' in the summary represents the max months invested for any SIP under that scheme,
-        # or simply the count of months an *active* SIP has been running if there's only one.
-        # Given the example output `months_invested: 5`, it suggests a simple sum or average isn't directly applicable
-        # across multiple SIP plans for the same scheme.
-        # For simplicity and aligning with the output format, if multiple SIPs for the same scheme exist,
-        # we'll sum the 'total_invested' and just take the maximum 'months_invested' for that scheme.
-        # Or, more robustly, if the summary is truly per-scheme, we should sum total invested and
-        # perhaps report the *earliest* start date's months_invested, or max.
-        # Let's sum total_invested and take the max months_invested for the scheme.
-
-        summary_by_scheme[sip.scheme_name]["total_invested"] += total_invested_for_sip
-        summary_by_scheme[sip.scheme_name]["months_invested"] = \
-            max(summary_by_scheme[sip.scheme_name]["months_invested"], months_invested)
+
+        # If multiple SIPs exist for the same scheme, we sum the 'total_invested'
+        # and take the maximum 'months_invested' for that scheme.
+        scheme_summary["total_invested"] += total_invested_for_sip
+        if months_invested > scheme_summary["months_invested"]:
+            scheme_summary["months_invested"] = months_invested
 
     # Convert dictionary values to a list
     return list(summary_by_scheme.values())
-
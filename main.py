@@ -1,13 +1,14 @@
 # main.py
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime, date, timezone
 from uuid import UUID
 
 # Import modules from our project
-from database import get_db, engine, Base
+from database import get_db
 from models import SIPPlan
 from schemas import SIPCreate, SIPResponse, SIPSummary
 from auth import get_current_user_id
@@ -18,22 +19,11 @@ app = FastAPI(
     title="Mini SIP Tracker API",
     description="A backend for tracking Systematic Investment Plans (SIPs) with user authentication.",
     version="1.0.0",
+    # Routes with a response_model are run through jsonable_encoder first, so orjson only
+    # serializes the resulting plain dicts/strings/floats (faster than the stdlib json.dumps)
+    default_response_class=ORJSONResponse,
 )
 
-# Event handler for application startup
-@app.on_event("startup")
-async def startup_event():
-    """
-    Event handler that runs when the FastAPI application starts up.
-    It creates all necessary database tables based on SQLAlchemy models.
-    """
-    async with engine.begin() as conn:
-        # Drop all tables and recreate them. Use with caution in production!
-        # This is good for development/testing to ensure a clean slate.
-        # await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-    print("Database tables created/checked.")
-
 # Root endpoint for basic health check
 @app.get("/")
 async def read_root():
@@ -51,8 +41,8 @@ async def read_root():
 )
 async def create_sip(
     sip: SIPCreate,
-    db: AsyncSession = Depends(get_db),
-    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db, scope="function"), # Commit before the response is sent
+    user_id: UUID = Depends(get_current_user_id),
 ):
     """
     Endpoint to create a new SIP plan for the authenticated user.
@@ -62,18 +52,8 @@ async def create_sip(
     - **user_id**: Authenticated user's ID injected by the JWT dependency.
     """
     try:
-        # Convert user_id string to UUID for the model
         sip_plan = await crud.create_sip_plan(db=db, sip=sip, user_id=user_id)
-        # Convert datetime objects to ISO format strings for response
-        return SIPResponse(
-            id=sip_plan.id,
-            user_id=sip_plan.user_id,
-            scheme_name=sip_plan.scheme_name,
-            monthly_amount=float(sip_plan.monthly_amount), # Convert Decimal to float for Pydantic
-            start_date=sip_plan.start_date,
-            created_at=sip_plan.created_at.isoformat(),
-            updated_at=sip_plan.updated_at.isoformat()
-        )
+        return SIPResponse.model_validate(sip_plan)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -88,8 +68,8 @@ async def create_sip(
     description="Retrieves a summary of all SIPs for the authenticated user, grouped by scheme.",
 )
 async def get_sip_summary(
-    db: AsyncSession = Depends(get_db),
-    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db, scope="function"), # Commit before the response is sent
+    user_id: UUID = Depends(get_current_user_id),
 ):
     """
     Endpoint to get a summary of SIPs for the authenticated user.
@@ -98,11 +78,8 @@ async def get_sip_summary(
     - **user_id**: Authenticated user's ID injected by the JWT dependency.
     """
     try:
-        sips = await crud.get_user_sips(db=db, user_id=user_id)
-        if not sips:
-            return [] # Return empty list if no SIPs found for the user
-
-        summary = crud.calculate_sip_summary(sips)
+        # Aggregated in the database; an empty list is returned if the user has no SIPs
+        summary = await crud.get_user_sip_summary(db=db, user_id=user_id)
         return summary
     except Exception as e:
         raise HTTPException(
@@ -1,7 +1,7 @@
 # models.py
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Numeric, Date, DateTime, text
+from sqlalchemy import Column, String, Numeric, Date, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from database import Base
@@ -12,11 +12,21 @@ class SIPPlan(Base):
     Represents a single Systematic Investment Plan (SIP) created by a user.
     """
     __tablename__ = "sips"
+    __table_args__ = (
+        # Serves the summary query (WHERE user_id = ? GROUP BY scheme_name) as an index-only scan.
+        # The leading user_id column also covers plain per-user lookups.
+        Index(
+            "ix_sips_user_scheme",
+            "user_id",
+            "scheme_name",
+            postgresql_include=("monthly_amount", "start_date"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
-    user_id = Column(UUID(as_uuid=True), nullable=False, index=True) # Link to the Supabase user ID
+    user_id = Column(UUID(as_uuid=True), nullable=False) # Link to the Supabase user ID
     scheme_name = Column(String, nullable=False)
-    monthly_amount = Column(Numeric(10, 2), nullable=False) # Store up to 2 decimal places
+    monthly_amount = Column(Numeric(10, 2, asdecimal=False), nullable=False) # Store up to 2 decimal places, read back as float
     start_date = Column(Date, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
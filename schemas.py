@@ -1,5 +1,5 @@
 # schemas.py
-from datetime import date
+from datetime import date, datetime
 from typing import List
 from pydantic import BaseModel, Field
 from uuid import UUID
@@ -22,8 +22,8 @@ class SIPResponse(BaseModel):
     scheme_name: str
     monthly_amount: float
     start_date: date
-    created_at: str # Use string for datetime in response for simplicity, or datetime object.
-    updated_at: str # Use string for datetime in response for simplicity, or datetime object.
+    created_at: datetime # Serialized as an ISO 8601 string in the JSON response
+    updated_at: datetime # Serialized as an ISO 8601 string in the JSON response
 
     class Config:
         from_attributes = True # Allow Pydantic to create model from SQLAlchemy model attributes
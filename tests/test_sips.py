@@ -2,14 +2,22 @@
 import pytest
 from httpx import AsyncClient
 from main import app
-from database import get_db, engine, Base, AsyncSessionLocal
+from database import get_db, engine, Base
 from models import SIPPlan
-from datetime import date
+from crud import calculate_sip_summary, get_user_sips
+from datetime import date, datetime
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from auth import create_mock_jwt, SUPABASE_SECRET_KEY
+from sqlalchemy import delete
+from uuid import UUID
+from auth import create_mock_jwt, get_current_user_id, SUPABASE_SECRET_KEY, _token_cache
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
 import os
+import time
 import asyncio
+import auth
 
 # Define a test user ID
 TEST_USER_ID = "00000000-0000-0000-0000-000000000001"
@@ -17,27 +25,44 @@ TEST_USER_ID = "00000000-0000-0000-0000-000000000001"
 TEST_JWT_TOKEN = create_mock_jwt(TEST_USER_ID, SUPABASE_SECRET_KEY)
 TEST_HEADERS = {"Authorization": f"Bearer {TEST_JWT_TOKEN}"}
 
+@pytest.fixture(scope="session")
+def database_schema():
+    """
+    Creates the database tables once for the whole test session and drops them at the end.
+    Runs on its own event loop, so pooled connections are disposed after setup and teardown;
+    db_session_fixture likewise disposes the pool after each test.
+    """
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    async def drop_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    asyncio.run(create_schema())
+    yield
+    asyncio.run(drop_schema())
+
+
 # Override the get_db dependency for testing
 @pytest.fixture(name="db_session")
-async def db_session_fixture():
+async def db_session_fixture(database_schema):
     """
     Provides a clean, independent database session for each test.
-    Rolls back transactions after each test to ensure test isolation.
+    The session runs inside an outer transaction that is rolled back after the test;
+    commits made by the test only release a SAVEPOINT, so nothing persists between tests.
     """
-    # Create the database tables for testing
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    # Use a separate session for tests
-    async with AsyncSessionLocal() as session:
-        try:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False) as session:
             yield session
-        finally:
-            # Clean up: drop all tables after tests or rollback for transaction isolation
-            # For this simple test, we'll drop and recreate tables to ensure isolation
-            await session.close()
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.drop_all)
+        await trans.rollback()
+    # Pooled connections are bound to this test's event loop; don't let later tests
+    # (or the schema teardown on its own loop) reuse them
+    await engine.dispose()
 
 
 @pytest.fixture(name="client")
@@ -71,6 +96,9 @@ async def test_create_sip_plan(client: AsyncClient):
     assert created_sip["user_id"] == TEST_USER_ID
     assert "id" in created_sip
     assert "created_at" in created_sip
+    # Datetimes are serialized by the response encoder as ISO 8601 strings
+    assert datetime.fromisoformat(created_sip["created_at"]).tzinfo is not None
+    assert datetime.fromisoformat(created_sip["updated_at"]).tzinfo is not None
 
     # Verify that the SIP was actually saved in the database
     db_session: AsyncSession = app.dependency_overrides[get_db]()
@@ -81,6 +109,36 @@ async def test_create_sip_plan(client: AsyncClient):
     assert sip_in_db.scheme_name == "Axis Bluechip Fund"
 
 
+@pytest.mark.asyncio
+async def test_create_sip_plan_commits_through_get_db(database_schema):
+    """
+    Test case for the real get_db dependency: the request's transaction is committed
+    before the response is returned, so the SIP is visible from a separate session.
+    """
+    sip_data = {
+        "scheme_name": "Mirae Asset Large Cap",
+        "monthly_amount": 2500.00,
+        "start_date": "2024-04-01"
+    }
+    # No dependency override here, so the request goes through get_db itself
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/sips/", json=sip_data, headers=TEST_HEADERS)
+    assert response.status_code == 201
+    sip_id = UUID(response.json()["id"])
+
+    try:
+        async with AsyncSession(engine) as session:
+            sip_in_db = await session.get(SIPPlan, sip_id)
+            assert sip_in_db is not None
+            assert sip_in_db.scheme_name == sip_data["scheme_name"]
+    finally:
+        # This row was really committed, so remove it explicitly
+        async with AsyncSession(engine) as session:
+            await session.execute(delete(SIPPlan).where(SIPPlan.id == sip_id))
+            await session.commit()
+        await engine.dispose() # Pooled connections are bound to this test's event loop
+
+
 @pytest.mark.asyncio
 async def test_get_sip_summary_no_sips(client: AsyncClient):
     """
@@ -161,6 +219,80 @@ async def test_get_sip_summary_with_sips(client: AsyncClient, db_session: AsyncS
     assert summary[1]["months_invested"] == expected_summary[1]["months_invested"]
 
 
+@pytest.mark.asyncio
+async def test_get_user_sips_rows_feed_summary(db_session: AsyncSession):
+    """
+    Test case for get_user_sips: it returns only the requesting user's SIPs as plain rows,
+    and those rows can be passed straight to calculate_sip_summary.
+    """
+    user_uuid = UUID(TEST_USER_ID)
+    other_user_uuid = UUID("00000000-0000-0000-0000-000000000002")
+
+    db_session.add_all([
+        SIPPlan(user_id=user_uuid, scheme_name="Parag Parikh Flexi Cap", monthly_amount=5000.00, start_date=date(2024, 1, 1)),
+        SIPPlan(user_id=user_uuid, scheme_name="Parag Parikh Flexi Cap", monthly_amount=2000.00, start_date=date(2024, 3, 1)),
+        SIPPlan(user_id=other_user_uuid, scheme_name="Kotak Equity Opportunities", monthly_amount=3000.00, start_date=date(2024, 2, 1)),
+    ])
+    await db_session.commit()
+
+    rows = await get_user_sips(db_session, user_uuid)
+    assert len(rows) == 2
+    assert {row.scheme_name for row in rows} == {"Parag Parikh Flexi Cap"}
+
+    today = date.today()
+    months_from_jan = (today.year - 2024) * 12 + (today.month - 1) + 1
+    months_from_mar = (today.year - 2024) * 12 + (today.month - 3) + 1
+
+    summary = calculate_sip_summary(rows)
+    assert len(summary) == 1
+    assert summary[0]["scheme_name"] == "Parag Parikh Flexi Cap"
+    assert summary[0]["total_invested"] == pytest.approx((5000 * months_from_jan) + (2000 * months_from_mar))
+    assert summary[0]["months_invested"] == months_from_jan
+
+
+@pytest.mark.asyncio
+async def test_expired_or_incomplete_tokens_rejected():
+    """
+    Test case for claim validation delegated to PyJWT: expired tokens and tokens
+    missing 'exp' or 'sub' are rejected with 401.
+    """
+    now = int(time.time())
+    payloads = {
+        "expired": {"sub": TEST_USER_ID, "exp": now - 60},
+        "missing exp": {"sub": TEST_USER_ID},
+        "missing sub": {"exp": now + 3600},
+    }
+    for case, payload in payloads.items():
+        token = auth.jwt.encode(payload, SUPABASE_SECRET_KEY, algorithm=auth.ALGORITHM)
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user_id(credentials)
+        assert exc_info.value.status_code == 401, case
+        assert token not in _token_cache, case
+
+
+def test_calculate_sip_summary_accepts_decimal_amounts():
+    """
+    Test case for calculate_sip_summary with SIPPlan instances holding Decimal amounts.
+    """
+    sip = SIPPlan(
+        user_id=UUID(TEST_USER_ID),
+        scheme_name="Axis Bluechip Fund",
+        monthly_amount=Decimal("10.00"),
+        start_date=date(2024, 1, 1)
+    )
+    today = date.today()
+    months_from_jan = (today.year - 2024) * 12 + (today.month - 1) + 1
+
+    summary = calculate_sip_summary([sip])
+    assert summary == [{
+        "scheme_name": "Axis Bluechip Fund",
+        "total_invested": pytest.approx(10.0 * months_from_jan),
+        "months_invested": months_from_jan
+    }]
+
+
 @pytest.mark.asyncio
 async def test_unauthenticated_access(client: AsyncClient):
     """
@@ -179,3 +311,53 @@ async def test_unauthenticated_access(client: AsyncClient):
     response = await client.get("/sips/summary") # No headers
     assert response.status_code == 403
 
+
+
+@pytest.mark.asyncio
+async def test_token_validation_is_cached(monkeypatch):
+    """
+    Test case for the in-process JWT cache: valid tokens are cached, invalid ones are not,
+    and expired cache entries are dropped and re-validated.
+    """
+    _token_cache.clear()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=TEST_JWT_TOKEN)
+
+    assert str(await get_current_user_id(credentials)) == TEST_USER_ID
+    assert TEST_JWT_TOKEN in _token_cache
+
+    # Count signature verifications from here on
+    decode_calls = []
+    real_decode = auth.jwt.decode
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(args)
+        return real_decode(*args, **kwargs)
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+
+    # Second call is served from the cache without verifying the token again
+    assert str(await get_current_user_id(credentials)) == TEST_USER_ID
+    assert decode_calls == []
+
+    # An expired cache entry is dropped and the token is validated afresh
+    _token_cache[TEST_JWT_TOKEN] = (UUID(TEST_USER_ID), time.time() - 1)
+    assert str(await get_current_user_id(credentials)) == TEST_USER_ID
+    assert len(decode_calls) == 1
+    assert _token_cache[TEST_JWT_TOKEN][1] > time.time() # Re-cached with the token's real 'exp'
+
+    bad_credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-jwt")
+    with pytest.raises(HTTPException):
+        await get_current_user_id(bad_credentials)
+    assert "not-a-jwt" not in _token_cache
+
+
+@pytest.mark.asyncio
+async def test_wrong_algorithm_token_rejected():
+    """
+    Test case for the header pre-check: tokens not signed with HS256 are rejected with 401.
+    """
+    import base64
+    header = base64.urlsafe_b64encode(b'{"alg":"none","typ":"JWT"}').rstrip(b"=").decode()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=f"{header}.e30.")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user_id(credentials)
+    assert exc_info.value.status_code == 401